@@ -1,91 +1,179 @@
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import heapq
+import os
 import re
+import itertools
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from typing import List
+import numpy as np
 from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
 
-app = FastAPI(title="PaperIQ API", version="0.1")
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the kernels below run as plain Python
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
 
-# --- utilities (same as prototype heuristics) ---
-def sentence_split(text):
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    sentences = [s.replace('\\n', ' ').strip() for s in sentences if len(s.strip())>0]
-    return sentences
+def _warm_worker():
+    # TextBlob loads its analyzer and the pattern sentiment lexicon lazily;
+    # pay for that when a worker process starts, not on its first request
+    TextBlob("warm up").sentiment
+
+# Analysis is CPU-bound, so it runs in worker processes; concurrent requests
+# then spread over all cores instead of queueing on one GIL. The pool is per
+# uvicorn process, so with `--workers N` set PAPERIQ_ANALYSIS_WORKERS to about
+# cores / N to avoid oversubscribing the machine.
+ANALYSIS_WORKERS = int(os.environ.get("PAPERIQ_ANALYSIS_WORKERS") or os.cpu_count() or 1)
+
+def _new_pool():
+    return ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS, initializer=_warm_worker)
+
+POOL = _new_pool()
+
+def _replace_broken_pool(broken):
+    # A worker that dies (OOM, native crash) leaves its pool permanently
+    # broken; swap in a fresh one so later requests can still be served.
+    # Concurrent requests may all see the same broken pool; only the first
+    # replaces it.
+    global POOL
+    if POOL is broken:
+        POOL = _new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Run one throwaway analysis so a worker is spawned and its lazy imports
+    # are done before the first real request arrives
+    await asyncio.get_running_loop().run_in_executor(POOL, run_analysis, "Warm up the analysis worker.")
+    yield
+    POOL.shutdown()
 
-def tokenize_words(text):
-    words = re.findall(r'\b[\w\']+\b', text.lower())
-    return words
+app = FastAPI(title="PaperIQ API", version="0.1", lifespan=lifespan)
 
-def type_token_ratio(words):
+# Patterns used on every request; compiled once at import. A sentence ends
+# at . ! or ? followed by whitespace.
+_SENT_BREAK_RE = re.compile(r'[.!?]\s+')
+_WORD_RE = re.compile(r'\b[\w\']+\b')
+
+# Fixed keyword sets matched against already-tokenized words
+_CAUSAL_SET = frozenset({"because", "therefore", "thus", "hence", "consequently", "so"})
+_MODAL_SET = frozenset({"may", "might", "could", "should", "would"})
+
+# --- utilities (same as prototype heuristics) ---
+def split_and_tokenize(text):
+    # One scan for sentence breaks; each sentence is cleaned and tokenized
+    # as it is cut out. Returns (sentences, per-sentence word lists).
+    text = text.strip()
+    sentences, sentence_tokens = [], []
+    start = 0
+    for m in _SENT_BREAK_RE.finditer(text):
+        s = text[start:m.start()+1].replace('\\n', ' ')
+        sentences.append(s.strip())
+        sentence_tokens.append(_WORD_RE.findall(s.lower()))
+        start = m.end()
+    if len(text) > start:
+        s = text[start:].replace('\\n', ' ')
+        sentences.append(s.strip())
+        sentence_tokens.append(_WORD_RE.findall(s.lower()))
+    return sentences, sentence_tokens
+
+def type_token_ratio(vocab, words):
     if not words:
         return 0.0
-    return len(set(words)) / len(words)
+    return len(vocab) / len(words)
 
-def avg_word_length(words):
-    if not words:
+# The numeric helpers below take NumPy arrays of word / sentence lengths
+def avg_word_length(wlen):
+    if not wlen.size:
         return 0.0
-    return sum(len(w) for w in words) / len(words)
+    return float(wlen.mean())
 
-def avg_sentence_length(sentences):
-    if not sentences:
+def avg_sentence_length(slen):
+    if not slen.size:
         return 0.0
-    lengths = [len(tokenize_words(s)) for s in sentences]
-    return sum(lengths) / len(lengths)
+    return float(slen.mean())
 
-def lexical_sophistication(words):
-    if not words:
+def lexical_sophistication(wlen):
+    if not wlen.size:
         return 0.0
-    long_words = sum(1 for w in words if len(w) > 6)
-    return long_words / len(words)
+    return float((wlen > 6).mean())
 
-def coherence_score(sentences):
-    if not sentences:
+def coherence_score(slen, mean):
+    # mean is the already-computed average sentence length; reusing it
+    # leaves a single vectorized pass for the variance
+    if not slen.size:
         return 0.0
-    lens = [len(tokenize_words(s)) for s in sentences]
-    mean = sum(lens)/len(lens)
-    var = sum((l-mean)**2 for l in lens)/len(lens)
+    var = np.square(slen - mean).mean()
     score = max(0.0, 1.0 - (var / (mean+1)**2))
-    return score
+    return float(score)
 
-def reasoning_proxy(sentences, words):
-    causal = sum(1 for s in sentences if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()))
-    modal = sum(1 for w in words if w in {"may","might","could","should","would"})
-    score = (causal / (len(sentences)+1)) - (modal / (len(words)+1))
+def reasoning_proxy(sentence_tokens, words, word_counts):
+    causal = sum(1 for toks in sentence_tokens if not _CAUSAL_SET.isdisjoint(toks))
+    modal = sum(word_counts[m] for m in _MODAL_SET)
+    score = (causal / (len(sentence_tokens)+1)) - (modal / (len(words)+1))
     return max(0.0, min(1.0, 0.5 + score))
 
 def compute_features(text):
-    sentences = sentence_split(text)
-    words = tokenize_words(text)
+    # Tokenize each sentence once; whole-text words and sentence lengths derive from it
+    sentences, sentence_tokens = split_and_tokenize(text)
+    words = list(itertools.chain.from_iterable(sentence_tokens))
+    # Map every token to an integer id in one pass; per-sentence unique
+    # counts then hash small ints instead of re-hashing strings
+    vocab = {}
+    sentence_ids = [[vocab.setdefault(w, len(vocab)) for w in toks] for toks in sentence_tokens]
+    # Counted once at C speed; keyword counts become a few dict lookups
+    word_counts = Counter(words)
+    wlen = np.fromiter((len(w) for w in words), dtype=np.int32, count=len(words))
+    slen = np.fromiter((len(t) for t in sentence_tokens), dtype=np.int32, count=len(sentence_tokens))
     features = {}
     features['word_count'] = len(words)
     features['sentence_count'] = len(sentences)
-    features['avg_sentence_len'] = avg_sentence_length(sentences)
-    features['avg_word_len'] = avg_word_length(words)
-    features['ttr'] = type_token_ratio(words)
-    features['lex_soph'] = lexical_sophistication(words)
-    features['coherence'] = coherence_score(sentences)
-    features['reasoning_proxy'] = reasoning_proxy(sentences, words)
+    features['avg_sentence_len'] = avg_sentence_length(slen)
+    features['avg_word_len'] = avg_word_length(wlen)
+    features['ttr'] = type_token_ratio(vocab, words)
+    features['lex_soph'] = lexical_sophistication(wlen)
+    features['coherence'] = coherence_score(slen, features['avg_sentence_len'])
+    features['reasoning_proxy'] = reasoning_proxy(sentence_tokens, words, word_counts)
     
     # Add sentiment analysis
     blob = TextBlob(text)
     features['sentiment_polarity'] = blob.sentiment.polarity
     features['sentiment_subjectivity'] = blob.sentiment.subjectivity
     
-    # Sentence-level sentiment
-    sentence_sentiments = []
-    for sentence in sentences:
-        sent_blob = TextBlob(sentence)
-        sentence_sentiments.append({
-            'text': sentence,
-            'polarity': sent_blob.sentiment.polarity,
-            'subjectivity': sent_blob.sentiment.subjectivity
-        })
+    # Sentence-level sentiment: call the pattern analyzer TextBlob(s).sentiment
+    # uses directly, skipping a TextBlob per sentence. It is given the sentence
+    # string, not our cached tokens, so pattern's own tokenizer splits
+    # contractions ("isn't" -> "is n't"), keeps emoticons and sees "!"; the
+    # scores match TextBlob exactly. This stays serial: the lookups are pure
+    # Python and hold the GIL, so a thread pool would not overlap them;
+    # parallelism comes from POOL across requests.
+    # These dicts are the final response items (see analyze); no second copy is built.
+    sentence_sentiments = [
+        {'text': sentence, 'polarity': polarity, 'subjectivity': subjectivity}
+        for sentence, (polarity, subjectivity) in zip(sentences, map(pattern_sentiment, sentences))
+    ]
     
-    return features, sentences, words, sentence_sentiments
+    return features, sentences, words, sentence_sentiments, sentence_tokens, sentence_ids
 
 def score_paper(features):
-    lang = 100 * (0.2*min(1.0, features['ttr']*1.5) + 0.3*min(1.0, features['lex_soph']*3) + 0.5*min(1.0, features['avg_word_len']/5))
+    # Each language term is capped at 1.0; inline conditionals avoid three min() calls
+    ttr = features['ttr']*1.5
+    soph = features['lex_soph']*3
+    wlen = features['avg_word_len']/5
+    lang = 100 * (0.2*(ttr if ttr < 1.0 else 1.0) + 0.3*(soph if soph < 1.0 else 1.0) + 0.5*(wlen if wlen < 1.0 else 1.0))
     coh = 100 * features['coherence']
     reason = 100 * features['reasoning_proxy']
     composite = round((0.4*lang + 0.3*coh + 0.3*reason), 2)
@@ -96,25 +184,51 @@ def score_paper(features):
         'composite': composite
     }
 
-def sentence_contributions(sentences, overall_features):
-    contributions = []
-    for s in sentences:
-        words = tokenize_words(s)
-        if not words:
-            contributions.append((s, 0.0))
+@njit(cache=True)
+def _score_sentences(sent_lens, sent_unique_counts, causal_flags, long_threshold):
+    scores = np.zeros(sent_lens.shape[0])
+    for i in range(sent_lens.shape[0]):
+        if sent_lens[i] == 0:
             continue
-        ttr = len(set(words))/len(words)
-        long = 1.0 if len(words) > max(40, overall_features['avg_sentence_len']*2) else 0.0
-        causal = 1.0 if re.search(r'\b(because|therefore|thus|hence|consequently|so)\b', s.lower()) else 0.0
+        ttr = sent_unique_counts[i] / sent_lens[i]
+        long = 1.0 if sent_lens[i] > long_threshold else 0.0
         neg = 0.0
         neg += long * 1.2
         neg += (1.0 - ttr) * 1.0
-        neg += (1.0 - causal) * 0.5
-        contributions.append((s, neg))
-    contributions.sort(key=lambda x: x[1], reverse=True)
-    return contributions
+        neg += (1.0 - causal_flags[i]) * 0.5
+        scores[i] = neg
+    return scores
+
+# Compile (or load from cache) at import so the first request doesn't pay for it
+_score_sentences(np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros(1), 40.0)
+
+def sentence_contributions(sentences, sentence_tokens, sentence_ids, overall_features):
+    # Set lookups stay in Python; the arithmetic runs in the kernel
+    n = len(sentences)
+    sent_lens = np.fromiter((len(ids) for ids in sentence_ids), dtype=np.int64, count=n)
+    sent_unique_counts = np.fromiter((len(set(ids)) for ids in sentence_ids), dtype=np.int64, count=n)
+    causal_flags = np.fromiter((0.0 if _CAUSAL_SET.isdisjoint(toks) else 1.0 for toks in sentence_tokens), dtype=np.float64, count=n)
+    long_threshold = float(max(40, overall_features['avg_sentence_len']*2))
+    scores = _score_sentences(sent_lens, sent_unique_counts, causal_flags, long_threshold)
+    # Negativity score per sentence, in sentence order
+    return scores.tolist()
+
+def run_analysis(text):
+    # Full pipeline for one text; runs inside a POOL worker, so only the small
+    # result tuple is pickled back rather than the token lists
+    features, sentences, words, sentence_sentiments, sentence_tokens, sentence_ids = compute_features(text)
+    scores = score_paper(features)
+    contribs = sentence_contributions(sentences, sentence_tokens, sentence_ids, features)
+    # Only the top 5 are returned, so select them without sorting every sentence
+    top_flagged = [sentences[i] for i in heapq.nlargest(5, range(len(sentences)), key=contribs.__getitem__)]
+    return features, scores, top_flagged, sentence_sentiments
 
 # --- API models ---
+# Upper bound on request text so one pasted blob can't tie up a worker
+MAX_TEXT_CHARS = 200_000
+# Upper bound on documents per /analyze/batch request
+MAX_BATCH_TEXTS = 8
+
 class AnalyzeRequest(BaseModel):
     text: str
 
@@ -132,25 +246,84 @@ class AnalyzeResponse(BaseModel):
     top_flagged_sentences: List[str]
     sentiment_analysis: List[SentimentInfo]
 
-@app.post('/analyze', response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest):
-    text = req.text or ''
+class BatchAnalyzeRequest(BaseModel):
+    texts: List[str]
+
+class BatchAnalyzeResponse(BaseModel):
+    results: List[AnalyzeResponse]
+
+# --- gzip request bodies ---
+# Clients may gzip large bodies (Content-Encoding: gzip). Decompression is
+# capped so a small compressed body can't expand past what a full batch of
+# MAX_TEXT_CHARS texts allows (UTF-8 plus JSON escaping stays well under 8
+# bytes per character).
+MAX_BODY_BYTES = 8 * MAX_TEXT_CHARS * MAX_BATCH_TEXTS
+
+class GzipRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    body = d.decompress(body, MAX_BODY_BYTES + 1)
+                except zlib.error:
+                    raise HTTPException(status_code=400, detail='Invalid gzip request body.')
+                if len(body) > MAX_BODY_BYTES:
+                    raise HTTPException(status_code=413, detail='Request body too large.')
+                if not d.eof:
+                    raise HTTPException(status_code=400, detail='Invalid gzip request body.')
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def gzip_route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return gzip_route_handler
+
+app.router.route_class = GzipRoute
+
+# Responses for recently analyzed texts, keyed by a hash of the text (LRU order).
+# Values are (response, approximate size in bytes); eviction keeps the total
+# under a byte budget, since a max-size text's result alone is over 1MB.
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_result_cache_bytes = 0
+
+def _result_size(text, sentence_sentiments):
+    # The sentence strings add up to about the text again (plus str overhead)
+    # and each sentence record costs roughly 500 bytes of Python objects
+    return 2 * len(text) + 512 * len(sentence_sentiments)
+
+def _check_text(text):
+    # Size check first: it is O(1), while strip() would copy an oversized body
+    if len(text) > MAX_TEXT_CHARS:
+        raise HTTPException(status_code=413, detail=f'Text too long. Provide at most {MAX_TEXT_CHARS} characters.')
     if len(text.strip()) < 20:
         raise HTTPException(status_code=400, detail='Text too short. Provide at least 20 characters.')
-    features, sentences, words, sentence_sentiments = compute_features(text)
-    scores = score_paper(features)
-    contribs = sentence_contributions(sentences, features)
-    top_flagged = [s for s, _ in contribs[:5]]
-    
-    # Convert sentence sentiments to response model
-    sentiment_analysis = [
-        SentimentInfo(
-            text=s['text'],
-            polarity=s['polarity'],
-            subjectivity=s['subjectivity']
-        ) for s in sentence_sentiments
-    ]
-    
+
+async def _analyze_text(text):
+    # Returns (text_hash, AnalyzeResponse), served from _RESULT_CACHE when possible
+    text_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    global _result_cache_bytes
+    cached = _RESULT_CACHE.get(text_hash)
+    if cached is not None:
+        _RESULT_CACHE.move_to_end(text_hash)
+        return text_hash, cached[0]
+
+    pool = POOL
+    try:
+        features, scores, top_flagged, sentence_sentiments = await asyncio.get_running_loop().run_in_executor(pool, run_analysis, text)
+    except BrokenProcessPool:
+        _replace_broken_pool(pool)
+        raise HTTPException(status_code=503, detail='Analysis worker crashed. Please retry.')
+
+    # sentence_sentiments is passed as plain dicts: pydantic-core validates
+    # the whole list in one call instead of one SentimentInfo(...) per sentence
     resp = AnalyzeResponse(
         composite = scores['composite'],
         language = scores['language'],
@@ -158,6 +331,37 @@ def analyze(req: AnalyzeRequest):
         reasoning = scores['reasoning'],
         diagnostics = features,
         top_flagged_sentences = top_flagged,
-        sentiment_analysis = sentiment_analysis
+        sentiment_analysis = sentence_sentiments
     )
+    # A concurrent request for the same text may have cached it meanwhile
+    if text_hash not in _RESULT_CACHE:
+        size = _result_size(text, sentence_sentiments)
+        _RESULT_CACHE[text_hash] = (resp, size)
+        _result_cache_bytes += size
+        while _result_cache_bytes > _RESULT_CACHE_MAX_BYTES:
+            _, (_, evicted) = _RESULT_CACHE.popitem(last=False)
+            _result_cache_bytes -= evicted
+    return text_hash, resp
+
+@app.post('/analyze', response_model=AnalyzeResponse)
+async def analyze(req: AnalyzeRequest, response: Response):
+    text = req.text or ''
+    _check_text(text)
+    text_hash, resp = await _analyze_text(text)
+    response.headers['ETag'] = f'"{text_hash}"'
+    response.headers['Cache-Control'] = 'private, max-age=3600'
     return resp
+
+@app.post('/analyze/batch', response_model=BatchAnalyzeResponse)
+async def analyze_batch(req: BatchAnalyzeRequest):
+    # Several documents in one round trip; they are analyzed concurrently on POOL
+    if not req.texts:
+        raise HTTPException(status_code=400, detail='Provide at least one text.')
+    if len(req.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=413, detail=f'Too many texts. Provide at most {MAX_BATCH_TEXTS} per batch.')
+    texts = [text or '' for text in req.texts]
+    # Validate everything before any work is queued
+    for text in texts:
+        _check_text(text)
+    results = await asyncio.gather(*(_analyze_text(text) for text in texts))
+    return BatchAnalyzeResponse(results=[resp for _, resp in results])
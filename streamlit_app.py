@@ -5,6 +5,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
+import html
 
 # Prefer environment variable, fall back to st.secrets if present. Accessing
 # `st.secrets` can raise when no secrets are configured, so protect it.
@@ -16,6 +17,26 @@ except Exception:
     # No secrets configured or access error — keep the environment/default value
     pass
 
+# Shared style for the flagged-sentence boxes
+_FLAG_STYLE = "<style>.flag{background-color:#2e7d32;color:white;padding:8px;border-radius:4px;margin:4px 0}</style>"
+
+@st.cache_resource
+def _session() -> requests.Session:
+    # Streamlit re-executes the script on every rerun; caching the session as
+    # a resource keeps its pooled keep-alive connections across reruns
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_analysis(text: str, api_url: str) -> dict:
+    # Non-200 responses raise, so errors are never stored in the cache
+    resp = _session().post(api_url, json={"text": text}, timeout=15)
+    resp.raise_for_status()
+    return resp.json()
+
 st.set_page_config(page_title="PaperIQ (Full)", layout="wide")
 st.title("PaperIQ — AI-Powered Research Insight Analyzer (Full Version)")
 st.write("Frontend: Streamlit UI calling FastAPI backend. Make sure the backend is running (uvicorn main:app --reload)")
@@ -28,12 +49,14 @@ if st.button("Analyze"):
         st.warning("Please paste at least 20 characters of text.")
     else:
         try:
-            resp = requests.post(API_URL, json={"text": text}, timeout=15)
-            if resp.status_code != 200:
-                st.error(f"API error: {resp.status_code} - {resp.text}")
+            try:
+                data = fetch_analysis(text, API_URL)
+                api_error = None
+            except requests.HTTPError as e:
+                api_error = f"API error: {e.response.status_code} - {e.response.text}"
+            if api_error:
+                st.error(api_error)
             else:
-                data = resp.json()
-                
                 # Main scores tab and visualizations tab
                 tab1, tab2 = st.tabs(["📊 Scores & Analysis", "📈 Visualizations"])
                 
@@ -110,8 +133,11 @@ if st.button("Analyze"):
                 
                 with col2:
                         st.write('### Top flagged sentences')
-                        for s in data['top_flagged_sentences']:
-                            st.markdown(f"<div style='background-color:#2e7d32;color:white;padding:8px;border-radius:4px;margin:4px 0'>{s}</div>", unsafe_allow_html=True)
+                        # One markdown block for all sentences. Whitespace is collapsed first:
+                        # a blank line inside a sentence would end the HTML block early. The text
+                        # is escaped since it comes straight from the pasted document
+                        flags = "".join(f"<div class='flag'>{html.escape(' '.join(s.split()))}</div>" for s in data['top_flagged_sentences'])
+                        st.markdown(_FLAG_STYLE + flags, unsafe_allow_html=True)
                 
                 with tab2:
                     st.markdown("""
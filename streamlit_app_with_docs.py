@@ -2,12 +2,22 @@ import streamlit as st
 import requests
 import os
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
-import docx
-import PyPDF2
+import pypdfium2 as pdfium
 import io
+import zipfile
+from lxml import etree
+import gzip
+import json
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; without it requests and responses go through json
+    orjson = None
 
 # Prefer environment variable, fall back to st.secrets if present. Accessing
 # `st.secrets` can raise when no secrets are configured, so protect it.
@@ -19,6 +29,310 @@ except Exception:
     # No secrets configured or access error — keep the environment/default value
     pass
 
+# Length of the document preview shown before analysis
+PREVIEW_CHARS = 1000
+
+# Request bodies at least this large are gzip-compressed before upload;
+# below it the compression overhead isn't worth it
+GZIP_MIN_BYTES = 16 * 1024
+
+# The backend's /analyze/batch accepts at most this many texts per request
+MAX_BATCH_TEXTS = 8
+# Request timeout per document in a batch, in seconds
+TIMEOUT_PER_TEXT = 15
+
+# Shared style for the flagged-sentence boxes
+_FLAG_STYLE = "<style>.flag{background-color:#2e7d32;color:white;padding:8px;border-radius:4px;margin:4px 0}</style>"
+
+# Labels and explanations for the diagnostics returned by the API (read-only)
+METRIC_NAMES = MappingProxyType({
+    'word_count': 'Total Word Count',
+    'sentence_count': 'Number of Sentences',
+    'avg_sentence_len': 'Average Sentence Length',
+    'avg_word_len': 'Average Word Length',
+    'ttr': 'Vocabulary Diversity Score',
+    'lex_soph': 'Lexical Sophistication',
+    'coherence': 'Coherence Score',
+    'reasoning_proxy': 'Reasoning Assessment',
+    'sentiment_polarity': 'Overall Sentiment',
+    'sentiment_subjectivity': 'Subjectivity Score'
+})
+
+METRIC_EXPLANATIONS = MappingProxyType({
+    'word_count': 'Total number of words in the text',
+    'sentence_count': 'Total number of complete sentences',
+    'avg_sentence_len': 'Words per sentence (ideal: 15-25)',
+    'avg_word_len': 'Average characters per word',
+    'ttr': 'Ratio of unique words to total words (0-1)',
+    'lex_soph': 'Measure of advanced vocabulary usage (0-1)',
+    'coherence': 'Text flow and consistency score (0-1)',
+    'reasoning_proxy': 'Presence of logical connections (0-1)',
+    'sentiment_polarity': 'Sentiment from -1 (negative) to 1 (positive)',
+    'sentiment_subjectivity': 'Subjectivity from 0 (objective) to 1 (subjective)'
+})
+
+# Hover explanations for the Advanced Metrics bars, in bar order
+ADV_METRIC_EXPLANATIONS = MappingProxyType({
+    'Average Word Length': 'Average number of characters per word. Higher values often indicate more technical/academic language.',
+    'Vocabulary Diversity': 'Ratio of unique words to total words (0-1). Higher values show more diverse vocabulary.',
+    'Language Sophistication': 'Measure of complex word usage (0-1). Higher values indicate more sophisticated language.'
+})
+
+# Diagnostics in display order: (key, label, explanation, value format)
+_DIAG_FIELDS = tuple((k, METRIC_NAMES[k], METRIC_EXPLANATIONS[k], fmt) for k, fmt in [
+    ('word_count', '{}'),
+    ('sentence_count', '{}'),
+    ('avg_sentence_len', '{:.2f}'),
+    ('avg_word_len', '{:.2f}'),
+    ('ttr', '{:.3f}'),
+    ('lex_soph', '{:.3f}'),
+    ('coherence', '{:.3f}'),
+    ('reasoning_proxy', '{:.3f}'),
+    ('sentiment_polarity', '{:.3f}'),
+    ('sentiment_subjectivity', '{:.3f}'),
+])
+
+@st.cache_resource
+def _pdfium_lock() -> threading.Lock:
+    # PDFium is not thread-safe, and each session's script runs on its own
+    # thread. All PDFium use goes through this one process-wide lock (a
+    # module-level lock would be recreated on every rerun).
+    return threading.Lock()
+
+# Extraction is cached on the file bytes (an UploadedFile itself isn't
+# hashable), so Streamlit reruns (widget clicks, expander toggles) don't
+# parse the document again.
+@st.cache_data(show_spinner=False)
+def _extract_pdf_preview(data: bytes) -> str:
+    # Parse only as many pages as it takes to fill the preview
+    parts, size = [], 0
+    with _pdfium_lock():
+        pdf = pdfium.PdfDocument(data)
+        try:
+            for page in pdf:
+                parts.append(page.get_textpage().get_text_range() or "")
+                size += len(parts[-1]) + 1
+                if size > PREVIEW_CHARS:
+                    break
+        finally:
+            pdf.close()
+    return "\n".join(parts)
+
+@st.cache_data(show_spinner=False)
+def _extract_pdf(data: bytes) -> str:
+    # PDFium parses natively; far faster than PyPDF2's pure-Python parser
+    # Collect pages and join once; += would re-copy the text per page
+    parts = []
+    with _pdfium_lock():
+        pdf = pdfium.PdfDocument(data)
+        try:
+            for page in pdf:
+                parts.append(page.get_textpage().get_text_range() or "")
+        finally:
+            pdf.close()
+    return "\n".join(parts)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Uploads are untrusted: never expand entities or fetch anything while parsing
+# (same settings as python-docx's own parser)
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+# Text equivalents of run content other than <w:t>/<w:br>, as in python-docx's Run.text
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+def _paragraph_text(p) -> str:
+    parts = []
+    for el in p.iterchildren(_W + "r", _W + "hyperlink"):
+        for run in ((el,) if el.tag == _W + "r" else el.iterchildren(_W + "r")):
+            for child in run:
+                if child.tag == _W + "t":
+                    parts.append(child.text or "")
+                elif child.tag == _W + "br":
+                    # Only line breaks count; page and column breaks are dropped
+                    if child.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                else:
+                    parts.append(_RUN_TEXT.get(child.tag, ""))
+    return "".join(parts)
+
+@st.cache_data(show_spinner=False)
+def _extract_docx(data: bytes) -> str:
+    # Walk word/document.xml directly instead of building python-docx's
+    # Paragraph/Run proxies, which dominate extraction on long documents
+    buf = io.BytesIO(data)
+    try:
+        with zipfile.ZipFile(buf) as z:
+            body = etree.parse(z.open("word/document.xml"), _XML_PARSER).getroot().find(_W + "body")
+        return "\n".join([_paragraph_text(p) for p in body.iterchildren(_W + "p")])
+    except (zipfile.BadZipFile, KeyError, AttributeError, etree.XMLSyntaxError):
+        # Unusual packaging (e.g. a renamed main part); let python-docx resolve it
+        # python-docx is only needed here, so it isn't imported up front
+        import docx
+        buf.seek(0)
+        doc = docx.Document(buf)
+        return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+
+@st.cache_resource
+def _session() -> requests.Session:
+    # Streamlit re-executes the script on every rerun; caching the session as
+    # a resource keeps its pooled keep-alive connections across reruns
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _executor() -> ThreadPoolExecutor:
+    # Analysis requests run here so the script thread never blocks on the API.
+    # Each browser session gets its own single-thread executor, so one user's
+    # request never queues behind another's; it goes away with the session.
+    if "analysis_executor" not in st.session_state:
+        st.session_state["analysis_executor"] = ThreadPoolExecutor(max_workers=1)
+    return st.session_state["analysis_executor"]
+
+# Runs on an _executor() thread, where there is no script context to draw a spinner
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_analyses(texts: tuple, api_url: str) -> list:
+    # Documents go to the batch endpoint, up to MAX_BATCH_TEXTS per round
+    # trip. Non-200 responses raise, so errors are never stored in the cache.
+    results = []
+    for i in range(0, len(texts), MAX_BATCH_TEXTS):
+        batch = list(texts[i:i + MAX_BATCH_TEXTS])
+        payload = {"texts": batch}
+        body = orjson.dumps(payload) if orjson else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        resp = _session().post(api_url + "/batch", data=body, headers=headers, timeout=TIMEOUT_PER_TEXT * len(batch))
+        resp.raise_for_status()
+        # Responses carry a record per sentence, so parse them with orjson when available
+        results.extend((orjson.loads(resp.content) if orjson else resp.json())["results"])
+    return results
+
+# Figures are pure functions of the analysis numbers; caching them on those
+# primitives makes reruns (tab switches, expander toggles) a lookup
+@st.cache_data(show_spinner=False)
+def _fig_radar(language: float, coherence: float, reasoning: float) -> go.Figure:
+    scores = {
+        'Category': ['Language\\nQuality', 'Coherence\\n& Flow', 'Reasoning\\nStrength'],
+        'Score': [language, coherence, reasoning]
+    }
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=scores['Score'],
+        theta=scores['Category'],
+        fill='toself',
+        name='Score Distribution',
+        fillcolor='rgba(46, 125, 50, 0.5)',
+        line=dict(color='#2e7d32', width=2)
+    ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0,100], tickfont=dict(size=12), ticksuffix='%'),
+            angularaxis=dict(tickfont=dict(size=14, family="Arial, sans-serif"))
+        ),
+        showlegend=False,
+        title=dict(text='Score Distribution by Category', x=0.5, y=0.95, font=dict(size=20)),
+        margin=dict(t=100, b=50),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _fig_bars(avg_word_len: float, ttr: float, lex_soph: float) -> go.Figure:
+    # Three fixed bars; a plain go.Bar skips the DataFrame and px.bar's schema inference
+    values = [avg_word_len, ttr, lex_soph]
+    fig = go.Figure(go.Bar(
+        x=list(ADV_METRIC_EXPLANATIONS),
+        y=values,
+        customdata=list(ADV_METRIC_EXPLANATIONS.values()),
+        hovertemplate="<b>%{x}</b><br>Score: %{y:.2f}<br><br>%{customdata}<extra></extra>",
+        marker_color='#1e88e5'  # Material blue
+    ))
+
+    fig.update_layout(
+        title=dict(
+            text='Detailed Language Analysis',
+            font=dict(size=20),
+            x=0.5,
+            xanchor='center'
+        ),
+        hoverlabel=dict(
+            bgcolor="white",
+            font_size=14,
+            font_family="Arial"
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(245,245,245,1)',  # Light gray background
+        yaxis=dict(
+            title="Score",
+            tickformat='.2f',
+            gridcolor='rgba(200,200,200,0.2)',
+            range=[0, max(values) * 1.2]  # Add 20% padding to top
+        ),
+        xaxis=dict(
+            title="",
+            showgrid=False
+        )
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _fig_sentiment(polarity, subjectivity, texts: list) -> go.Figure:
+    # WebGL markers stay responsive with the thousands of sentences in a long paper
+    fig = go.Figure(go.Scattergl(
+        x=polarity,
+        y=subjectivity,
+        mode='markers',
+        text=texts,
+        hovertemplate="polarity=%{x:.3f}<br>subjectivity=%{y:.3f}<br>text=%{text}<extra></extra>",
+        marker=dict(size=10, color='#2e7d32', opacity=0.7)
+    ))
+    fig.update_layout(
+        title='Sentiment Distribution by Sentence',
+        xaxis_title='polarity',
+        yaxis_title='subjectivity',
+        plot_bgcolor='rgba(245,245,245,1)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+def _to_soa(records):
+    # Per-sentence records -> (polarity, subjectivity, texts): two float32
+    # columns for the numeric work plus the sentence texts for hover labels
+    import numpy as np
+    n = len(records)
+    pol = np.fromiter((r['polarity'] for r in records), dtype=np.float32, count=n)
+    subj = np.fromiter((r['subjectivity'] for r in records), dtype=np.float32, count=n)
+    return pol, subj, [r['text'] for r in records]
+
+def _aggregate(pol, subj):
+    # Polarity range and mean, mean subjectivity, and how many sentences lean
+    # positive/negative; vectorized NumPy reductions over the column arrays
+    return pol.min(), pol.max(), pol.mean(), subj.mean(), int((pol > 0).sum()), int((pol < 0).sum())
+
+@st.fragment(run_every=0.5)
+def _poll_analysis():
+    # Only this fragment reruns while the request is in flight; once it
+    # finishes the results are stored and the full page reruns to show them
+    future, upload_key, names = st.session_state["analysis_job"]
+    if not future.done():
+        st.info("Analyzing…")
+        return
+    del st.session_state["analysis_job"]
+    try:
+        results = future.result()
+        st.session_state["analysis_results"] = list(zip(names, results))
+        # Column arrays are built once per response and reused on every rerun
+        st.session_state["sent_arrays"] = [_to_soa(data.get('sentiment_analysis', [])) for data in results]
+        st.session_state["analysis_key"] = upload_key
+    except requests.HTTPError as e:
+        st.session_state["analysis_error"] = f"API error: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        st.session_state["analysis_error"] = f"Failed to call API: {e}"
+    st.rerun()
+
 st.set_page_config(page_title="PaperIQ (Full) with Documentation", layout="wide")
 st.title("PaperIQ — AI-Powered Research Insight Analyzer")
 
@@ -26,269 +340,200 @@ st.title("PaperIQ — AI-Powered Research Insight Analyzer")
 tab_main, tab_docs = st.tabs(["📝 Analysis Tool", "📚 Documentation"])
 
 with tab_main:
-    st.markdown("### Upload your document")
-    st.markdown("Supported formats: PDF (.pdf) or Word (.docx)")
+    st.markdown("### Upload your documents")
+    st.markdown("Supported formats: PDF (.pdf) or Word (.docx). Several files can be analyzed together.")
     
-    uploaded_file = st.file_uploader("Choose a file", type=['pdf', 'docx'])
-    text = ""
+    uploaded_files = st.file_uploader("Choose files", type=['pdf', 'docx'], accept_multiple_files=True)
+    # (name, text, pdf_bytes) per file; PDF text is only extracted once Analyze is clicked
+    documents = []
     
-    if uploaded_file is not None:
+    if uploaded_files:
+        st.markdown("### Document Preview")
+    for uploaded_file in uploaded_files or []:
+        text = ""
+        preview = ""
+        pdf_bytes = None
         try:
+            # Read the upload once; the extractors take (and cache on) the raw bytes
+            raw = uploaded_file.getvalue()
             if uploaded_file.type == "application/pdf":
-                import PyPDF2
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+                pdf_bytes = raw
+                preview = _extract_pdf_preview(pdf_bytes)
             
             elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                doc = docx.Document(uploaded_file)
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+                text = _extract_docx(raw)
+                preview = text
         
         except Exception as e:
-            st.error(f"Error reading file: {str(e)}")
+            st.error(f"Error reading {uploaded_file.name}: {str(e)}")
             text = ""
+            preview = ""
+            pdf_bytes = None
         
-        st.markdown("### Document Preview")
-        with st.expander("Show document content"):
-            st.text(text[:1000] + ("..." if len(text) > 1000 else ""))
+        documents.append((uploaded_file.name, text, pdf_bytes))
+        with st.expander(f"Show document content: {uploaded_file.name}"):
+            st.text(preview[:PREVIEW_CHARS] + ("..." if len(preview) > PREVIEW_CHARS else ""))
+
+    # Results live in session state so widgets inside them (like the document
+    # picker) survive the rerun they trigger; they are dropped once the set of
+    # uploaded files changes.
+    upload_key = tuple(f.file_id for f in uploaded_files or [])
+    if st.session_state.get("analysis_key") != upload_key:
+        st.session_state.pop("analysis_results", None)
+        st.session_state.pop("sent_arrays", None)
 
     if st.button("Analyze"):
-        if not text or len(text.strip())<20:
-            st.warning("Please upload a document with at least 20 characters of text.")
+        texts = []
+        for name, text, pdf_bytes in documents:
+            if pdf_bytes is not None:
+                try:
+                    text = _extract_pdf(pdf_bytes)
+                except Exception as e:
+                    st.error(f"Error reading {name}: {str(e)}")
+            texts.append(text)
+        if not texts or any(len(t.strip()) < 20 for t in texts):
+            st.warning("Please upload documents with at least 20 characters of text each.")
         else:
-            try:
-                resp = requests.post(API_URL, json={"text": text}, timeout=15)
-                if resp.status_code != 200:
-                    st.error(f"API error: {resp.status_code} - {resp.text}")
-                else:
-                    data = resp.json()
-
-                    # Create tabs: scores, visualizations, and sentiment
-                    tab1, tab2, tab3 = st.tabs(["📊 Scores & Analysis", "📈 Visualizations", "💭 Sentiment Analysis"])
-
-                    with tab1:
-                        col1, col2 = st.columns([1,2])
-                        with col1:
-                            st.metric("PaperIQ (composite)", f"{data['composite']}/100")
-                            st.write(f"**Language:** {data['language']}/100")
-                            st.write(f"**Coherence:** {data['coherence']}/100")
-                            st.write(f"**Reasoning (proxy):** {data['reasoning']}/100")
-                        with col2:
-                            st.write('### Top flagged sentences')
-                            for s in data.get('top_flagged_sentences', []):
-                                st.markdown(f"<div style='background-color:#2e7d32;color:white;padding:8px;border-radius:4px;margin:4px 0'>{s}</div>", unsafe_allow_html=True)
-
-                        st.markdown('---')
-                        st.write('### Detailed Analysis')
-
-                        metric_names = {
-                            'word_count': 'Total Word Count',
-                            'sentence_count': 'Number of Sentences',
-                            'avg_sentence_len': 'Average Sentence Length',
-                            'avg_word_len': 'Average Word Length',
-                            'ttr': 'Vocabulary Diversity Score',
-                            'lex_soph': 'Lexical Sophistication',
-                            'coherence': 'Coherence Score',
-                            'reasoning_proxy': 'Reasoning Assessment',
-                            'sentiment_polarity': 'Overall Sentiment',
-                            'sentiment_subjectivity': 'Subjectivity Score'
-                        }
-
-                        metric_explanations = {
-                            'word_count': 'Total number of words in the text',
-                            'sentence_count': 'Total number of complete sentences',
-                            'avg_sentence_len': 'Words per sentence (ideal: 15-25)',
-                            'avg_word_len': 'Average characters per word',
-                            'ttr': 'Ratio of unique words to total words (0-1)',
-                            'lex_soph': 'Measure of advanced vocabulary usage (0-1)',
-                            'coherence': 'Text flow and consistency score (0-1)',
-                            'reasoning_proxy': 'Presence of logical connections (0-1)',
-                            'sentiment_polarity': 'Sentiment from -1 (negative) to 1 (positive)',
-                            'sentiment_subjectivity': 'Subjectivity from 0 (objective) to 1 (subjective)'
-                        }
-
-                        for k, v in data.get('diagnostics', {}).items():
-                            if k not in metric_names:
-                                continue
-                            if v is None:
-                                formatted_value = 'N/A'
-                            elif k in ['avg_sentence_len', 'avg_word_len']:
-                                formatted_value = f"{v:.2f}"
-                            elif k in ['ttr', 'lex_soph', 'coherence', 'reasoning_proxy', 'sentiment_polarity', 'sentiment_subjectivity']:
-                                formatted_value = f"{v:.3f}"
+            future = _executor().submit(fetch_analyses, tuple(texts), API_URL)
+            st.session_state["analysis_job"] = (future, upload_key, [name for name, _, _ in documents])
+
+    if "analysis_job" in st.session_state:
+        _poll_analysis()
+    if "analysis_error" in st.session_state:
+        st.error(st.session_state.pop("analysis_error"))
+
+    results = st.session_state.get("analysis_results")
+    if results:
+        choice = 0
+        if len(results) > 1:
+            choice = st.selectbox("Show results for", range(len(results)), format_func=lambda i: results[i][0], key="result_doc")
+        data = results[choice][1]
+        pol, subj, sent_texts = st.session_state["sent_arrays"][choice]
+        try:
+            # st.tabs runs every panel's body on each rerun; with a radio only
+            # the selected view is built
+            view = st.radio("View", ["📊 Scores & Analysis", "📈 Visualizations", "💭 Sentiment Analysis"], horizontal=True, key="view", label_visibility="collapsed")
+
+            if view == "📊 Scores & Analysis":
+                col1, col2 = st.columns([1,2])
+                with col1:
+                    st.metric("PaperIQ (composite)", f"{data['composite']}/100")
+                    st.write(f"**Language:** {data['language']}/100")
+                    st.write(f"**Coherence:** {data['coherence']}/100")
+                    st.write(f"**Reasoning (proxy):** {data['reasoning']}/100")
+                with col2:
+                    st.write('### Top flagged sentences')
+                    # One markdown block for all sentences. Whitespace is collapsed first:
+                    # a blank line inside a sentence would end the HTML block early. The text
+                    # is escaped since it comes straight from the uploaded document
+                    flags = "".join(f"<div class='flag'>{html.escape(' '.join(s.split()))}</div>" for s in data.get('top_flagged_sentences', []))
+                    st.markdown(_FLAG_STYLE + flags, unsafe_allow_html=True)
+
+                st.markdown('---')
+                st.write('### Detailed Analysis')
+
+                diag = data.get('diagnostics', {})
+                for k, name, explanation, fmt in _DIAG_FIELDS:
+                    if k not in diag:
+                        continue
+                    v = diag[k]
+                    formatted_value = 'N/A' if v is None else fmt.format(v)
+
+                    with st.expander(f"**{name}**: {formatted_value}"):
+                        st.write(explanation)
+                        if k == 'avg_sentence_len' and isinstance(v, (int, float)):
+                            if 15 <= v <= 25:
+                                st.success("✓ Ideal sentence length for academic writing")
+                            elif v < 15:
+                                st.warning("Consider combining some shorter sentences")
                             else:
-                                formatted_value = str(v)
-
-                            with st.expander(f"**{metric_names[k]}**: {formatted_value}"):
-                                st.write(metric_explanations[k])
-                                if k == 'avg_sentence_len' and isinstance(v, (int, float)):
-                                    if 15 <= v <= 25:
-                                        st.success("✓ Ideal sentence length for academic writing")
-                                    elif v < 15:
-                                        st.warning("Consider combining some shorter sentences")
-                                    else:
-                                        st.warning("Consider breaking down some longer sentences")
-                                if k == 'ttr' and v is not None:
-                                    if v > 0.7:
-                                        st.success("✓ Excellent vocabulary diversity")
-                                    elif v > 0.5:
-                                        st.info("Good vocabulary range")
-                                    else:
-                                        st.warning("Consider using more varied vocabulary")
-                                if k == 'coherence' and v is not None:
-                                    if v > 0.8:
-                                        st.success("✓ Strong text coherence")
-                                    elif v > 0.6:
-                                        st.info("Acceptable coherence")
-                                    else:
-                                        st.warning("Consider improving text flow and transitions")
-
-                    with tab2:
-                        st.markdown("""
-                        ### 📈 Analysis Dashboard
-                        This dashboard provides visual insights into your text's characteristics across multiple dimensions.
-                        """)
-
-                        st.markdown("#### 📊 Key Metrics")
-                        met1, met2, met3 = st.columns(3)
-                        with met1:
-                            st.metric("Total Words", data['diagnostics'].get('word_count', 0), help="Total number of words in your text")
-                        with met2:
-                            st.metric("Sentence Count", data['diagnostics'].get('sentence_count', 0), help="Number of complete sentences detected")
-                        with met3:
-                            avg_len = data['diagnostics'].get('avg_sentence_len', 0)
-                            try:
-                                avg_len_fmt = f"{round(avg_len,1)} words"
-                            except Exception:
-                                avg_len_fmt = str(avg_len)
-                            st.metric("Avg. Sentence Length", avg_len_fmt, help="Average number of words per sentence - Good academic writing typically averages 20-25 words")
-
-                        # Radar chart
-                        st.markdown("#### 🎯 Core Scores Analysis")
-                        scores = {
-                            'Category': ['Language\\nQuality', 'Coherence\\n& Flow', 'Reasoning\\nStrength'],
-                            'Score': [data.get('language', 0), data.get('coherence', 0), data.get('reasoning', 0)]
-                        }
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatterpolar(
-                            r=scores['Score'],
-                            theta=scores['Category'],
-                            fill='toself',
-                            name='Score Distribution',
-                            fillcolor='rgba(46, 125, 50, 0.5)',
-                            line=dict(color='#2e7d32', width=2)
-                        ))
-                        fig.update_layout(
-                            polar=dict(
-                                radialaxis=dict(visible=True, range=[0,100], tickfont=dict(size=12), ticksuffix='%'),
-                                angularaxis=dict(tickfont=dict(size=14, family="Arial, sans-serif"))
-                            ),
-                            showlegend=False,
-                            title=dict(text='Score Distribution by Category', x=0.5, y=0.95, font=dict(size=20)),
-                            margin=dict(t=100, b=50),
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            plot_bgcolor='rgba(0,0,0,0)'
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-
-                        # Advanced metrics with explanations
-                        st.markdown("#### 📐 Advanced Metrics")
-                        st.markdown("""
-                        These metrics provide deeper insight into your text's sophistication and structure.
-                        Hover over the bars for detailed explanations.
-                        """)
-                        
-                        metric_explanations = {
-                            'Average Word Length': 'Average number of characters per word. Higher values often indicate more technical/academic language.',
-                            'Vocabulary Diversity': 'Ratio of unique words to total words (0-1). Higher values show more diverse vocabulary.',
-                            'Language Sophistication': 'Measure of complex word usage (0-1). Higher values indicate more sophisticated language.'
-                        }
-                        
-                        word_metrics = {
-                            'Metric': list(metric_explanations.keys()),
-                            'Value': [
-                                data['diagnostics'].get('avg_word_len', 0),
-                                data['diagnostics'].get('ttr', 0),
-                                data['diagnostics'].get('lex_soph', 0)
-                            ],
-                            'Explanation': list(metric_explanations.values())
-                        }
-                        df = pd.DataFrame(word_metrics)
-                        
-                        fig = px.bar(df, 
-                                    x='Metric', 
-                                    y='Value',
-                                    title='Detailed Language Analysis',
-                                    labels={'Value': 'Score', 'Metric': ''},
-                                    color_discrete_sequence=['#1e88e5'],  # Material blue
-                                    custom_data=['Explanation'])
-                                    
-                        fig.update_traces(
-                            hovertemplate="<b>%{x}</b><br>Score: %{y:.2f}<br><br>%{customdata[0]}"
-                        )
-                        
-                        fig.update_layout(
-                            title=dict(
-                                font=dict(size=20),
-                                x=0.5,
-                                xanchor='center'
-                            ),
-                            hoverlabel=dict(
-                                bgcolor="white",
-                                font_size=14,
-                                font_family="Arial"
-                            ),
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            plot_bgcolor='rgba(245,245,245,1)',  # Light gray background
-                            yaxis=dict(
-                                title="Score",
-                                tickformat='.2f',
-                                gridcolor='rgba(200,200,200,0.2)',
-                                range=[0, max(df['Value']) * 1.2]  # Add 20% padding to top
-                            ),
-                            xaxis=dict(
-                                title="",
-                                showgrid=False
-                            )
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-
-                    with tab3:
-                        st.markdown("### 💭 Sentiment Analysis")
-                        st.markdown("This section provides insights into the emotional tone and subjectivity of your text.")
-
-                        # Overall sentiment
-                        sent1, sent2 = st.columns(2)
-                        with sent1:
-                            polarity = data['diagnostics'].get('sentiment_polarity', 0.0)
-                            st.metric("Sentiment Polarity", f"{polarity:.2f}", help="Ranges from -1 (negative) to 1 (positive)")
-                            if polarity > 0.3:
-                                st.success("The text has a positive tone")
-                            elif polarity < -0.3:
-                                st.error("The text has a negative tone")
+                                st.warning("Consider breaking down some longer sentences")
+                        if k == 'ttr' and v is not None:
+                            if v > 0.7:
+                                st.success("✓ Excellent vocabulary diversity")
+                            elif v > 0.5:
+                                st.info("Good vocabulary range")
                             else:
-                                st.info("The text has a neutral tone")
-                        with sent2:
-                            subjectivity = data['diagnostics'].get('sentiment_subjectivity', 0.0)
-                            st.metric("Subjectivity Score", f"{subjectivity:.2f}", help="Ranges from 0 (objective) to 1 (subjective)")
-                            if subjectivity > 0.7:
-                                st.info("The text is highly subjective")
-                            elif subjectivity < 0.3:
-                                st.info("The text is mostly objective")
+                                st.warning("Consider using more varied vocabulary")
+                        if k == 'coherence' and v is not None:
+                            if v > 0.8:
+                                st.success("✓ Strong text coherence")
+                            elif v > 0.6:
+                                st.info("Acceptable coherence")
                             else:
-                                st.info("The text has a balanced subjective/objective tone")
-
-                        # Sentence-level plot
-                        sentences_df = pd.DataFrame(data.get('sentiment_analysis', []))
-                        if not sentences_df.empty:
-                            fig = px.scatter(sentences_df, x='polarity', y='subjectivity', hover_data=['text'], title='Sentiment Distribution by Sentence')
-                            fig.update_traces(marker=dict(size=10, color='#2e7d32', opacity=0.7))
-                            fig.update_layout(plot_bgcolor='rgba(245,245,245,1)', paper_bgcolor='rgba(0,0,0,0)')
-                            st.plotly_chart(fig, use_container_width=True)
-
-            except Exception as e:
-                st.error(f"Failed to call API: {e}")
+                                st.warning("Consider improving text flow and transitions")
+
+            elif view == "📈 Visualizations":
+                st.markdown("""
+                ### 📈 Analysis Dashboard
+                This dashboard provides visual insights into your text's characteristics across multiple dimensions.
+                """)
+
+                st.markdown("#### 📊 Key Metrics")
+                met1, met2, met3 = st.columns(3)
+                with met1:
+                    st.metric("Total Words", data['diagnostics'].get('word_count', 0), help="Total number of words in your text")
+                with met2:
+                    st.metric("Sentence Count", data['diagnostics'].get('sentence_count', 0), help="Number of complete sentences detected")
+                with met3:
+                    avg_len = data['diagnostics'].get('avg_sentence_len', 0)
+                    try:
+                        avg_len_fmt = f"{round(avg_len,1)} words"
+                    except Exception:
+                        avg_len_fmt = str(avg_len)
+                    st.metric("Avg. Sentence Length", avg_len_fmt, help="Average number of words per sentence - Good academic writing typically averages 20-25 words")
+
+                # Radar chart
+                st.markdown("#### 🎯 Core Scores Analysis")
+                st.plotly_chart(_fig_radar(data.get('language', 0), data.get('coherence', 0), data.get('reasoning', 0)), use_container_width=True)
+
+                # Advanced metrics with explanations
+                st.markdown("#### 📐 Advanced Metrics")
+                st.markdown("""
+                These metrics provide deeper insight into your text's sophistication and structure.
+                Hover over the bars for detailed explanations.
+                """)
+                
+                diag = data['diagnostics']
+                st.plotly_chart(_fig_bars(diag.get('avg_word_len', 0), diag.get('ttr', 0), diag.get('lex_soph', 0)), use_container_width=True)
+
+            else:
+                st.markdown("### 💭 Sentiment Analysis")
+                st.markdown("This section provides insights into the emotional tone and subjectivity of your text.")
+
+                # Overall sentiment
+                sent1, sent2 = st.columns(2)
+                with sent1:
+                    polarity = data['diagnostics'].get('sentiment_polarity', 0.0)
+                    st.metric("Sentiment Polarity", f"{polarity:.2f}", help="Ranges from -1 (negative) to 1 (positive)")
+                    if polarity > 0.3:
+                        st.success("The text has a positive tone")
+                    elif polarity < -0.3:
+                        st.error("The text has a negative tone")
+                    else:
+                        st.info("The text has a neutral tone")
+                with sent2:
+                    subjectivity = data['diagnostics'].get('sentiment_subjectivity', 0.0)
+                    st.metric("Subjectivity Score", f"{subjectivity:.2f}", help="Ranges from 0 (objective) to 1 (subjective)")
+                    if subjectivity > 0.7:
+                        st.info("The text is highly subjective")
+                    elif subjectivity < 0.3:
+                        st.info("The text is mostly objective")
+                    else:
+                        st.info("The text has a balanced subjective/objective tone")
+
+                # Sentence-level plot
+                if sent_texts:
+                    st.plotly_chart(_fig_sentiment(pol, subj, sent_texts), use_container_width=True)
+                    lo, hi, mean_pol, mean_subj, n_pos, n_neg = _aggregate(pol, subj)
+                    st.caption(
+                        f"Across {len(sent_texts)} sentences polarity ranges from {lo:.2f} to {hi:.2f} "
+                        f"(mean {mean_pol:.2f}, mean subjectivity {mean_subj:.2f}); "
+                        f"{n_pos} lean positive and {n_neg} negative."
+                    )
+        except Exception as e:
+            st.error(f"Failed to display analysis: {e}")
+
 
 with tab_docs:
     st.markdown("""